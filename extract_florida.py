@@ -1,32 +1,122 @@
+import os
+from array import array
 import osmium
-import csv
-
-class NodeHandler(osmium.SimpleHandler):
-    def __init__(self):
-        super().__init__()
-        self.nodes = []
-        self.count = 0
-    
-    def node(self, n):
-        if n.location.valid():
-            self.nodes.append((n.id, n.location.lon, n.location.lat))
-            self.count += 1
-            if self.count % 1000000 == 0:
-                print(f"Processed {self.count // 1000000}M nodes...")
+import numpy as np
+from numba import njit, prange
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# libosmium's PBF decode pool defaults to cores - 2 threads; raise it to all cores
+# (read when the pool is first used, an explicit override wins)
+os.environ.setdefault('OSMIUM_POOL_THREADS', str(os.cpu_count() or 1))
+
+def read_nodes(path):
+    """Return (ids, lons, lats) columns for every node with a valid location"""
+    # One typed array per column (8 bytes per value) instead of boxed per-node objects
+    ids, lons, lats = array('q'), array('d'), array('d')
+    for n in osmium.FileProcessor(path, osmium.osm.osm_entity_bits.NODE):
+        loc = n.location
+        if loc.valid():
+            ids.append(n.id)
+            lons.append(loc.lon)
+            lats.append(loc.lat)
+            if len(ids) % 1000000 == 0:
+                print(f"Processed {len(ids) // 1000000}M nodes...")
+    # Zero-copy NumPy views over the array buffers
+    return (np.frombuffer(ids, np.int64), np.frombuffer(lons, np.float64),
+            np.frombuffer(lats, np.float64))
+
+def write_parquet(path, ids, lons, lats):
+    table = pa.table({'id': ids, 'lon': lons, 'lat': lats})
+    pq.write_table(table, path, compression='zstd')
+
+FIXED_SCALE = 10_000_000  # 7 decimal places, OSM's nanodegree resolution
+ROWS_PER_WRITE = 1 << 20
+
+@njit(cache=True)
+def _ndigits(v):
+    n = 1
+    while v >= 10:
+        v //= 10
+        n += 1
+    return n
+
+@njit(cache=True)
+def _int_len(v):
+    return _ndigits(-v) + 1 if v < 0 else _ndigits(v)
+
+@njit(cache=True)
+def _fixed_len(v):
+    # [-]int.frac with a 7-digit fraction
+    return (v < 0) + _ndigits(abs(v) // FIXED_SCALE) + 8
+
+@njit(cache=True)
+def _put_int(out, pos, v):
+    if v < 0:
+        out[pos] = 45  # '-'
+        pos += 1
+        v = -v
+    n = _ndigits(v)
+    for k in range(n):
+        out[pos + n - 1 - k] = 48 + v % 10
+        v //= 10
+    return pos + n
+
+@njit(cache=True)
+def _put_fixed(out, pos, v):
+    if v < 0:
+        out[pos] = 45  # '-'
+        pos += 1
+        v = -v
+    pos = _put_int(out, pos, v // FIXED_SCALE)
+    out[pos] = 46  # '.'
+    frac = v % FIXED_SCALE
+    for k in range(7):
+        out[pos + 7 - k] = 48 + frac % 10
+        frac //= 10
+    return pos + 8
+
+@njit(parallel=True, cache=True)
+def row_lengths(ids, lon_i32, lat_i32):
+    lengths = np.empty(len(ids), np.int64)
+    for i in prange(len(ids)):
+        lengths[i] = _int_len(ids[i]) + _fixed_len(lon_i32[i]) + _fixed_len(lat_i32[i]) + 3
+    return lengths
+
+@njit(parallel=True, cache=True)
+def format_rows(ids, lon_i32, lat_i32, starts, out):
+    """Write "id,lon,lat\\n" for every row into out at the precomputed starts"""
+    for i in prange(len(ids)):
+        pos = _put_int(out, starts[i], ids[i])
+        out[pos] = 44  # ','
+        pos = _put_fixed(out, pos + 1, lon_i32[i])
+        out[pos] = 44
+        pos = _put_fixed(out, pos + 1, lat_i32[i])
+        out[pos] = 10  # '\n'
+
+def write_csv(path, ids, lons, lats):
+    """Legacy CSV export (id,lon,lat) read by the C++ benchmark loader"""
+    with open(path, 'wb', buffering=1 << 20) as f:
+        f.write(b"id,lon,lat\n")
+        for start in range(0, len(ids), ROWS_PER_WRITE):
+            rows = slice(start, start + ROWS_PER_WRITE)
+            # OSM coordinates are stored as 1e-7 degree integers, so this round-trips exactly;
+            # converted per block to keep temporaries at ROWS_PER_WRITE size
+            lon_i32 = np.rint(lons[rows] * FIXED_SCALE).astype(np.int32)
+            lat_i32 = np.rint(lats[rows] * FIXED_SCALE).astype(np.int32)
+            lengths = row_lengths(ids[rows], lon_i32, lat_i32)
+            ends = np.cumsum(lengths)
+            out = np.empty(ends[-1], np.uint8)
+            format_rows(ids[rows], lon_i32, lat_i32, ends - lengths, out)
+            f.write(out)
 
 print("Extracting nodes from Florida OSM data...")
-handler = NodeHandler()
-handler.apply_file("data/florida-latest.osm.pbf")
+ids, lons, lats = read_nodes("data/florida-latest.osm.pbf")
 
-print(f"\nTotal nodes: {len(handler.nodes):,}")
+print(f"\nTotal nodes: {len(ids):,}")
+print("Writing to Parquet...")
+write_parquet('data/florida_nodes.parquet', ids, lons, lats)
 print("Writing to CSV...")
+write_csv('data/florida_nodes.csv', ids, lons, lats)
 
-with open('data/florida_nodes.csv', 'w', newline='') as f:
-    writer = csv.writer(f)
-    writer.writerow(['id', 'lon', 'lat'])
-    for i, (node_id, lon, lat) in enumerate(handler.nodes):
-        writer.writerow([node_id, lon, lat])
-        if (i + 1) % 1000000 == 0:
-            print(f"  Wrote {(i+1) // 1000000}M...")
-
-print("Done! Saved to data/florida_nodes.csv")
+print("Done! Saved to data/florida_nodes.parquet and data/florida_nodes.csv")
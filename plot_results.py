@@ -1,112 +1,155 @@
 #!/usr/bin/env python3
+import matplotlib
+matplotlib.use('Agg')  # Non-interactive backend; plots are only written to disk
 import matplotlib.pyplot as plt
 import numpy as np
-import json
+import os
 import sys
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib parser
+    orjson = None
+    import json
 from pathlib import Path
 
 def load_results(filename='benchmark_results.json'):
     """Load benchmark results from JSON file"""
-    with open(filename, 'r') as f:
+    with open(filename, 'rb') as f:
+        if orjson is not None:
+            return orjson.loads(f.read())
         return json.load(f)
 
-def plot_comparison(results, output_dir='plots'):
-    """Create comparison plots for all datasets"""
+# Learned indexes are the linear RMIs and the hybrid NN models
+LEARNED_KINDS = ('Linear', 'Hybrid')
+KIND_COLORS = {'B-Tree': '#3498db', 'Linear': '#2ecc71', 'Hybrid': '#e74c3c', 'Other': '#e74c3c'}
+
+def classify_results(results):
+    """Map each dataset to {'B-Tree': [...], 'Linear': [...], 'Hybrid': [...], 'Other': [...]} config indices"""
+    kinds = {}
+    for dataset_name, data in results.items():
+        kind = {'B-Tree': [], 'Linear': [], 'Hybrid': [], 'Other': []}
+        for i, r in enumerate(data):
+            if 'B-Tree' in r['name']:
+                kind['B-Tree'].append(i)
+            elif 'HYBRID' in r['name']:  # before 'Linear': hybrid names end in '... Linear'
+                kind['Hybrid'].append(i)
+            elif 'Linear' in r['name']:
+                kind['Linear'].append(i)
+            else:
+                kind['Other'].append(i)
+        kinds[dataset_name] = kind
+    return kinds
+
+def _bar_panel(ax, configs, values, colors, ylabel, title, fmt):
+    """Draw one bar chart panel with a value label on each bar"""
+    bars = ax.bar(range(len(configs)), values, color=colors, alpha=0.7, edgecolor='black', rasterized=True)
+    ax.set_xlabel('Configuration', fontweight='bold')
+    ax.set_ylabel(ylabel, fontweight='bold')
+    ax.set_title(title, fontweight='bold')
+    ax.set_xticks(range(len(configs)))
+    ax.set_xticklabels(configs, rotation=45, ha='right', fontsize=8)
+    ax.grid(axis='y', alpha=0.3)
+    
+    # Add value labels on bars
+    ax.bar_label(bars, labels=[fmt.format(v) for v in values], padding=2, fontsize=8)
+
+# Per-process figure reused for every dataset a worker renders;
+# recreating it leaks matplotlib artists
+_comparison_fig = None
+
+def _comparison_figure():
+    global _comparison_fig
+    if _comparison_fig is None:
+        _comparison_fig = plt.subplots(2, 2, figsize=(14, 10))
+    return _comparison_fig
+
+def _close_comparison_figure():
+    """Release the cached figure; pool workers free it on exit, in-process callers must call this"""
+    global _comparison_fig
+    if _comparison_fig is not None:
+        plt.close(_comparison_fig[0])
+        _comparison_fig = None
+
+def render_dataset(args):
+    """Render the four-panel comparison plot for one dataset, return the output path"""
+    dataset_name, data, kind, output_dir, dpi = args
+    fig, axes = _comparison_figure()
+    
+    configs = [r['name'] for r in data]
+    build_times = [r['build_time_ms'] for r in data]
+    lookup_times = [r['avg_lookup_ns'] for r in data]
+    sizes = [r['size_mb'] for r in data]
+    
+    for ax in axes.flat:
+        ax.clear()
+    fig.suptitle(f'{dataset_name} - Performance Comparison', fontsize=16, fontweight='bold')
+    
+    # Colors: B-Trees in blue, linear RMIs in green, hybrid NN models (and anything else) in red
+    colors = [None] * len(configs)
+    for k, idx in kind.items():
+        for i in idx:
+            colors[i] = KIND_COLORS[k]
+    
+    # Plot 1: Build Time
+    _bar_panel(axes[0, 0], configs, build_times, colors,
+               'Build Time (ms)', 'Build Time Comparison', '{:.0f}')
+    
+    # Plot 2: Lookup Time
+    _bar_panel(axes[0, 1], configs, lookup_times, colors,
+               'Avg Lookup Time (ns)', 'Lookup Speed Comparison', '{:.0f}')
+    
+    # Plot 3: Memory Usage
+    _bar_panel(axes[1, 0], configs, sizes, colors,
+               'Memory Size (MB)', 'Memory Usage Comparison', '{:.1f}')
+    
+    # Plot 4: Speedup vs Best B-Tree
+    ax4 = axes[1, 1]
+    lookup_arr = np.asarray(lookup_times)
+    best_btree_time = min((lookup_arr[i] for i in kind['B-Tree']), default=lookup_arr[0])
+    speedups = best_btree_time / lookup_arr
+    
+    _bar_panel(ax4, configs, speedups, colors,
+               'Speedup Factor', 'Speedup vs Best B-Tree', '{:.1f}×')
+    ax4.axhline(y=1.0, color='red', linestyle='--', linewidth=2, label='Baseline (Best B-Tree)')
+    ax4.legend()
+    
+    fig.tight_layout()
+    
+    # Save plot
+    safe_name = dataset_name.replace(' ', '_').replace('(', '').replace(')', '')
+    output_file = f'{output_dir}/{safe_name}.png'
+    fig.savefig(output_file, dpi=dpi, pil_kwargs={'compress_level': 1})
+    fig.canvas.flush_events()
+    return output_file
+
+def plot_comparison(results, output_dir='plots', dpi=150, kinds=None):
+    """Create comparison plots for all datasets, one worker process per dataset (up to the CPU count)"""
     Path(output_dir).mkdir(exist_ok=True)
+    kinds = classify_results(results) if kinds is None else kinds
     
-    for dataset_name, data in results.items():
-        configs = [r['name'] for r in data]
-        build_times = [r['build_time_ms'] for r in data]
-        lookup_times = [r['avg_lookup_ns'] for r in data]
-        sizes = [r['size_mb'] for r in data]
-        errors = [r['avg_error'] for r in data]
-        
-        # Create figure with subplots
-        fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-        fig.suptitle(f'{dataset_name} - Performance Comparison', fontsize=16, fontweight='bold')
-        
-        # Colors: B-Trees in blue, Learned in green/orange
-        colors = ['#3498db' if 'B-Tree' in c else '#2ecc71' if 'linear' in c else '#e74c3c' for c in configs]
-        
-        # Plot 1: Build Time
-        ax1 = axes[0, 0]
-        bars1 = ax1.bar(range(len(configs)), build_times, color=colors, alpha=0.7, edgecolor='black')
-        ax1.set_xlabel('Configuration', fontweight='bold')
-        ax1.set_ylabel('Build Time (ms)', fontweight='bold')
-        ax1.set_title('Build Time Comparison', fontweight='bold')
-        ax1.set_xticks(range(len(configs)))
-        ax1.set_xticklabels(configs, rotation=45, ha='right', fontsize=8)
-        ax1.grid(axis='y', alpha=0.3)
-        
-        # Add value labels on bars
-        for bar, val in zip(bars1, build_times):
-            height = bar.get_height()
-            ax1.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{val:.0f}', ha='center', va='bottom', fontsize=8)
-        
-        # Plot 2: Lookup Time
-        ax2 = axes[0, 1]
-        bars2 = ax2.bar(range(len(configs)), lookup_times, color=colors, alpha=0.7, edgecolor='black')
-        ax2.set_xlabel('Configuration', fontweight='bold')
-        ax2.set_ylabel('Avg Lookup Time (ns)', fontweight='bold')
-        ax2.set_title('Lookup Speed Comparison', fontweight='bold')
-        ax2.set_xticks(range(len(configs)))
-        ax2.set_xticklabels(configs, rotation=45, ha='right', fontsize=8)
-        ax2.grid(axis='y', alpha=0.3)
-        
-        for bar, val in zip(bars2, lookup_times):
-            height = bar.get_height()
-            ax2.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{val:.0f}', ha='center', va='bottom', fontsize=8)
-        
-        # Plot 3: Memory Usage
-        ax3 = axes[1, 0]
-        bars3 = ax3.bar(range(len(configs)), sizes, color=colors, alpha=0.7, edgecolor='black')
-        ax3.set_xlabel('Configuration', fontweight='bold')
-        ax3.set_ylabel('Memory Size (MB)', fontweight='bold')
-        ax3.set_title('Memory Usage Comparison', fontweight='bold')
-        ax3.set_xticks(range(len(configs)))
-        ax3.set_xticklabels(configs, rotation=45, ha='right', fontsize=8)
-        ax3.grid(axis='y', alpha=0.3)
-        
-        for bar, val in zip(bars3, sizes):
-            height = bar.get_height()
-            ax3.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{val:.1f}', ha='center', va='bottom', fontsize=8)
-        
-        # Plot 4: Speedup vs Best B-Tree
-        ax4 = axes[1, 1]
-        btree_times = [t for c, t in zip(configs, lookup_times) if 'B-Tree' in c]
-        best_btree_time = min(btree_times) if btree_times else lookup_times[0]
-        speedups = [best_btree_time / t for t in lookup_times]
-        
-        bars4 = ax4.bar(range(len(configs)), speedups, color=colors, alpha=0.7, edgecolor='black')
-        ax4.axhline(y=1.0, color='red', linestyle='--', linewidth=2, label='Baseline (Best B-Tree)')
-        ax4.set_xlabel('Configuration', fontweight='bold')
-        ax4.set_ylabel('Speedup Factor', fontweight='bold')
-        ax4.set_title('Speedup vs Best B-Tree', fontweight='bold')
-        ax4.set_xticks(range(len(configs)))
-        ax4.set_xticklabels(configs, rotation=45, ha='right', fontsize=8)
-        ax4.grid(axis='y', alpha=0.3)
-        ax4.legend()
-        
-        for bar, val in zip(bars4, speedups):
-            height = bar.get_height()
-            ax4.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{val:.1f}×', ha='center', va='bottom', fontsize=8)
-        
-        plt.tight_layout()
-        
-        # Save plot
-        safe_name = dataset_name.replace(' ', '_').replace('(', '').replace(')', '')
-        output_file = f'{output_dir}/{safe_name}.png'
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
-        print(f'✓ Saved plot: {output_file}')
-        plt.close()
+    jobs = [(name, data, kinds[name], output_dir, dpi) for name, data in results.items()]
+    
+    # A single dataset is not worth forking a matplotlib process for
+    if len(jobs) <= 1:
+        for job in jobs:
+            print(f'✓ Saved plot: {render_dataset(job)}')
+        _close_comparison_figure()
+        return
+    
+    # Fork where available so workers inherit the imported modules (spawn elsewhere).
+    # The fork context starts every worker up front, so cap them at the number of jobs
+    ctx = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else None
+    max_workers = min(len(jobs), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx) as ex:
+        for output_file in ex.map(render_dataset, jobs):
+            print(f'✓ Saved plot: {output_file}')
 
-def plot_summary(results, output_dir='plots'):
+def plot_summary(results, output_dir='plots', dpi=150, kinds=None):
     """Create a summary plot comparing all datasets"""
     Path(output_dir).mkdir(exist_ok=True)
+    kinds = classify_results(results) if kinds is None else kinds
     
     # Extract best learned index for each dataset
     dataset_names = []
@@ -114,20 +157,17 @@ def plot_summary(results, output_dir='plots'):
     btree_baseline = []
     
     for dataset_name, data in results.items():
-        configs = [r['name'] for r in data]
+        kind = kinds[dataset_name]
         lookup_times = [r['avg_lookup_ns'] for r in data]
         
         # Get best B-Tree and best learned index
-        btree_times = [(c, t) for c, t in zip(configs, lookup_times) if 'B-Tree' in c]
-        learned_times = [(c, t) for c, t in zip(configs, lookup_times) if 'Learned' in c]
+        best_btree = min((lookup_times[i] for i in kind['B-Tree']), default=None)
+        best_learned = min((lookup_times[i] for k in LEARNED_KINDS for i in kind[k]), default=None)
         
-        if btree_times and learned_times:
-            best_btree = min(btree_times, key=lambda x: x[1])
-            best_learned = min(learned_times, key=lambda x: x[1])
-            
+        if best_btree is not None and best_learned is not None:
             dataset_names.append(dataset_name.split('(')[0].strip())
-            btree_baseline.append(best_btree[1])
-            learned_speedups.append(best_btree[1] / best_learned[1])
+            btree_baseline.append(best_btree)
+            learned_speedups.append(best_btree / best_learned)
     
     # Create summary plot
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
@@ -138,9 +178,10 @@ def plot_summary(results, output_dir='plots'):
     
     # Plot 1: Absolute lookup times
     bars1_btree = ax1.bar(x - width/2, btree_baseline, width, label='Best B-Tree', 
-                          color='#3498db', alpha=0.7, edgecolor='black')
+                          color='#3498db', alpha=0.7, edgecolor='black', rasterized=True)
     bars1_learned = ax1.bar(x + width/2, [b/s for b, s in zip(btree_baseline, learned_speedups)], 
-                           width, label='Best Learned', color='#2ecc71', alpha=0.7, edgecolor='black')
+                           width, label='Best Learned', color='#2ecc71', alpha=0.7, edgecolor='black',
+                           rasterized=True)
     
     ax1.set_xlabel('Dataset', fontweight='bold')
     ax1.set_ylabel('Lookup Time (ns)', fontweight='bold')
@@ -151,7 +192,7 @@ def plot_summary(results, output_dir='plots'):
     ax1.grid(axis='y', alpha=0.3)
     
     # Plot 2: Speedup factors
-    bars2 = ax2.bar(x, learned_speedups, color='#2ecc71', alpha=0.7, edgecolor='black')
+    bars2 = ax2.bar(x, learned_speedups, color='#2ecc71', alpha=0.7, edgecolor='black', rasterized=True)
     ax2.axhline(y=1.0, color='red', linestyle='--', linewidth=2, label='Baseline')
     ax2.set_xlabel('Dataset', fontweight='bold')
     ax2.set_ylabel('Speedup Factor', fontweight='bold')
@@ -161,27 +202,27 @@ def plot_summary(results, output_dir='plots'):
     ax2.grid(axis='y', alpha=0.3)
     ax2.legend()
     
-    for bar, val in zip(bars2, learned_speedups):
-        height = bar.get_height()
-        ax2.text(bar.get_x() + bar.get_width()/2., height,
-                f'{val:.1f}×', ha='center', va='bottom', fontsize=10, fontweight='bold')
+    ax2.bar_label(bars2, labels=[f'{v:.1f}×' for v in learned_speedups], padding=2, fontsize=10, fontweight='bold')
     
-    plt.tight_layout()
+    fig.tight_layout()
     output_file = f'{output_dir}/summary.png'
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    fig.savefig(output_file, dpi=dpi, pil_kwargs={'compress_level': 1})
     print(f'✓ Saved summary plot: {output_file}')
-    plt.close()
+    plt.close(fig)
 
 def main():
-    input_file = 'benchmark_results.json' if len(sys.argv) < 2 else sys.argv[1]
-    output_dir = 'plots' if len(sys.argv) < 3 else sys.argv[2]
+    args = [a for a in sys.argv[1:] if a != '--hi-dpi']
+    dpi = 300 if '--hi-dpi' in sys.argv[1:] else 150
+    input_file = 'benchmark_results.json' if len(args) < 1 else args[0]
+    output_dir = 'plots' if len(args) < 2 else args[1]
     
     print(f'Loading results from {input_file}...')
     results = load_results(input_file)
+    kinds = classify_results(results)
     
     print(f'Generating plots in {output_dir}/...')
-    plot_comparison(results, output_dir)
-    plot_summary(results, output_dir)
+    plot_comparison(results, output_dir, dpi, kinds)
+    plot_summary(results, output_dir, dpi, kinds)
     
     print(f'\n✓ All plots generated successfully!')
     print(f'  View plots in: {output_dir}/')